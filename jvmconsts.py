@@ -1,5 +1,5 @@
 from enum import Enum, auto
-from typing import Any, List, Tuple, Union
+from typing import Any, Dict, List, Tuple, Union
 
 class Constant(Enum):
     CONSTANT_Class              = 7
@@ -53,6 +53,10 @@ METHOD_ACCESS_FLAGS : List[Tuple[str, int]] = [
     ("ACC_SYNTHETIC", 0x1000),
 ]
 
+# mask -> name, for decoding flag values one set bit at a time
+CLASS_ACCESS_FLAG_NAMES : Dict[int, str] = {mask: name for (name, mask) in CLASS_ACCESS_FLAGS}
+METHOD_ACCESS_FLAG_NAMES : Dict[int, str] = {mask: name for (name, mask) in METHOD_ACCESS_FLAGS}
+
 class Opcode(Enum):
     getstatic = 0xB2
     ldc = 0x12
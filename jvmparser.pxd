@@ -0,0 +1,13 @@
+# Typed locals for the hot decoding loops, applied when jvmparser.py is compiled with Cython (see setup.py).
+import cython
+
+@cython.locals(i=cython.Py_ssize_t, off=cython.Py_ssize_t, tag_byte=cython.int,
+               constant_pool_count=cython.Py_ssize_t, interfaces_count=cython.Py_ssize_t,
+               fields_count=cython.Py_ssize_t, methods_count=cython.Py_ssize_t, attributes_count=cython.Py_ssize_t)
+cpdef parse_class_bytes(buf, interesting=*)
+
+@cython.locals(j=cython.Py_ssize_t, off=cython.Py_ssize_t, attribute_length=cython.Py_ssize_t)
+cpdef tuple parse_attributes(list constant_pool, buf, Py_ssize_t off, Py_ssize_t count, interesting)
+
+@cython.locals(off=cython.Py_ssize_t)
+cpdef tuple parse_u2_array(buf, Py_ssize_t off, Py_ssize_t count)
@@ -1,24 +1,159 @@
-from dataclasses import dataclass
-from enum import Enum, auto
-from io import BufferedReader
-from typing import Any, List, Tuple, Union, Dict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, fields as dataclass_fields
+from enum import Enum, IntEnum, auto
+from functools import lru_cache, partial
+from typing import Any, Callable, ClassVar, FrozenSet, List, Optional, Tuple, Union, Dict
 from pprint import pprint
+import struct
+import sys
 
 from jvmconsts import *
 from utils import *
 
+# Constant pool entries, one slotted record per tag (the tag itself is a class constant)
+@dataclass(slots=True)
+class CpUtf8:
+    tag : ClassVar[str] = Constant.CONSTANT_Utf8.name
+    bytes : bytes
+
+@dataclass(slots=True)
+class CpInteger:
+    tag : ClassVar[str] = Constant.CONSTANT_Integer.name
+    bytes : int
+
+@dataclass(slots=True)
+class CpFloat:
+    tag : ClassVar[str] = Constant.CONSTANT_Float.name
+    bytes : float
+
+@dataclass(slots=True)
+class CpLong:
+    tag : ClassVar[str] = Constant.CONSTANT_Long.name
+    bytes : int
+
+@dataclass(slots=True)
+class CpDouble:
+    tag : ClassVar[str] = Constant.CONSTANT_Double.name
+    bytes : int # raw high << 32 | low bits
+
+@dataclass(slots=True)
+class CpClass:
+    tag : ClassVar[str] = Constant.CONSTANT_Class.name
+    name_index : int
+
+@dataclass(slots=True)
+class CpString:
+    tag : ClassVar[str] = Constant.CONSTANT_String.name
+    string_index : int
+
+@dataclass(slots=True)
+class CpFieldref:
+    tag : ClassVar[str] = Constant.CONSTANT_Fieldref.name
+    class_index : int
+    name_and_type_index : int
+
+@dataclass(slots=True)
+class CpMethodref:
+    tag : ClassVar[str] = Constant.CONSTANT_Methodref.name
+    class_index : int
+    name_and_type_index : int
+
+@dataclass(slots=True)
+class CpInterfaceMethodref:
+    tag : ClassVar[str] = Constant.CONSTANT_InterfaceMethodref.name
+    class_index : int
+    name_and_type_index : int
+
+@dataclass(slots=True)
+class CpNameAndType:
+    tag : ClassVar[str] = Constant.CONSTANT_NameAndType.name
+    name_index : int
+    descriptor_index : int
+
+@dataclass(slots=True)
+class CpMethodHandle:
+    tag : ClassVar[str] = Constant.CONSTANT_MethodHandle.name
+    reference_kind : int
+    reference_index : int
+
+@dataclass(slots=True)
+class CpMethodType:
+    tag : ClassVar[str] = Constant.CONSTANT_MethodType.name
+    descriptor_index : int
+
+@dataclass(slots=True)
+class CpInvokeDynamic:
+    tag : ClassVar[str] = Constant.CONSTANT_InvokeDynamic.name
+    bootstrap_method_attr_index : int
+    name_and_type_index : int
+
+CpInfo = Union[CpUtf8, CpInteger, CpFloat, CpLong, CpDouble, CpClass, CpString, CpFieldref, CpMethodref,
+               CpInterfaceMethodref, CpNameAndType, CpMethodHandle, CpMethodType, CpInvokeDynamic]
+
+@dataclass(slots=True)
+class AttributeInfo:
+    attribute_name_index : int
+    kind : 'AttributeKind'
+    info : Any # parsed attribute body, a CodeAttribute or a dict for the other attributes
+
+@dataclass(slots=True)
+class CodeAttribute:
+    max_stack : int
+    max_locals : int
+    code : bytes # execute_method indexes it directly
+    exception_table : List['ExceptionTableEntry']
+    attributes : List[AttributeInfo]
+
+# Rows of the fixed-layout attribute tables
+@dataclass(slots=True)
+class ExceptionTableEntry:
+    start_pc : int
+    end_pc : int
+    handler_pc : int
+    catch_type : int
+
+@dataclass(slots=True)
+class InnerClassEntry:
+    inner_class_info_index : int
+    outer_class_info_index : int
+    inner_name_index : int
+    inner_class_access_flags : int
+
+@dataclass(slots=True)
+class LineNumberEntry:
+    start_pc : int
+    line_number : int
+
+@dataclass(slots=True)
+class FieldInfo:
+    access_flags : int
+    name_index : int
+    descriptor_index : int
+    attributes : List[AttributeInfo]
+
+@dataclass(slots=True)
+class MethodInfo:
+    access_flags : Tuple[str, ...]
+    name_index : int
+    descriptor_index : int
+    attributes : List[AttributeInfo]
+
 @dataclass
 class JVMClassFile:
     version : Tuple[int, int]
-    constant_pool : List[dict]
-    methods : List[dict]
-    methods_lookup : dict
-    attributes : List[dict]
-    access_flags : List[str]
+    constant_pool : List[Optional[CpInfo]] # None for the unusable slot after each Long/Double
+    methods : List[MethodInfo]
+    methods_lookup : Dict[Tuple[str, str], MethodInfo]
+    attributes : List[AttributeInfo]
+    access_flags : Tuple[str, ...]
     this_class : int
     super_class : int
     interfaces : List[dict]
-    fields : List[dict]
+    fields : List[FieldInfo]
+    utf8 : List[Optional[str]] # CONSTANT_Utf8 entries decoded on first use, parallel to constant_pool
+    bootstrap_methods : Optional[List[dict]] = None # cached from the BootstrapMethods attribute
+    methods_by_name : Dict[bytes, List[MethodInfo]] = field(default_factory=dict)
+    attributes_by_kind : Dict['AttributeKind', List[AttributeInfo]] = field(default_factory=dict)
 
 class AttributeInfoName(Enum):
     BOOTSTRAP_METHOD = b'BootstrapMethods'
@@ -35,143 +170,187 @@ class AttributeInfoName(Enum):
     EXCEPTIONS = b'Exceptions'
     NEST_MEMBERS = b'NestMembers'
 
-def get_name_of_class(constant_pool : List[dict], class_index: int) -> str:
-    return constant_pool[constant_pool[class_index - 1]['name_index'] - 1]['bytes'].decode('utf-8')
+# Small int tag stored on each parsed attribute, cheaper to compare and hash than the name bytes
+class AttributeKind(IntEnum):
+    UNKNOWN = 0 # an attribute missing from AttributeInfoName, only kept when its body is skipped
+    BOOTSTRAP_METHOD = auto()
+    INNER_CLASSES = auto()
+    SOURCE_FILE = auto()
+    CODE = auto()
+    LINE_NUMBER_TABLE = auto()
+    STACK_MAP_TABLE = auto()
+    CONSTANT_VALUE = auto()
+    SIGNATURE = auto()
+    RUNTIME_VISIBLE_ANNOTATIONS = auto()
+    LOCAL_VARIABLE_TABLE = auto()
+    LOCAL_VARIABLE_TYPE_TABLE = auto()
+    EXCEPTIONS = auto()
+    NEST_MEMBERS = auto()
+
+ATTRIBUTE_KINDS : Dict[bytes, AttributeKind] = {name.value: AttributeKind[name.name] for name in AttributeInfoName}
+
+# Attributes needed to execute code, the parser skips the bodies of all others by default
+EXECUTION_ATTRIBUTES : FrozenSet[AttributeKind] = frozenset({AttributeKind.CODE, AttributeKind.BOOTSTRAP_METHOD})
+
+CLASS_HEADER = struct.Struct('>IHHH')     # magic, minor_version, major_version, constant_pool_count
+CLASS_INFO = struct.Struct('>HHHH')       # access_flags, this_class, super_class, interfaces_count
+MEMBER_HEADER = struct.Struct('>HHHH')    # access_flags, name_index, descriptor_index, attributes_count
+ATTRIBUTE_HEADER = struct.Struct('>HI')   # attribute_name_index, attribute_length
+CODE_HEADER = struct.Struct('>HHI')       # max_stack, max_locals, code_length
+EXCEPTION_TABLE_ENTRY = struct.Struct('>HHHH') # start_pc, end_pc, handler_pc, catch_type
+INNER_CLASS_ENTRY = struct.Struct('>HHHH') # inner_class_info_index, outer_class_info_index, inner_name_index, inner_class_access_flags
+U2x2 = struct.Struct('>HH')
+U4x2 = struct.Struct('>II')
+
+def decode_modified_utf8(data : bytes) -> str:
+    # CONSTANT_Utf8 is "modified" UTF-8: NUL is written as C0 80 and supplementary characters as
+    # two encoded surrogates, both of which strict utf-8 rejects. Plain ASCII/BMP names take the fast path.
+    # Surrogates may also appear unpaired (javac writes "\uD800" as ED A0 80), those are kept as is:
+    #   b'a\xc0\x80b'               -> 'a\x00b'
+    #   b'\xed\xa0\xbd\xed\xb8\x80' -> '\U0001f600'
+    #   b'\xed\xa0\x80'             -> '\ud800'
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        s = data.replace(b'\xc0\x80', b'\x00').decode('utf-8', 'surrogatepass')
+        # joins the surrogate pairs, a lone surrogate passes through both steps unchanged
+        return s.encode('utf-16-be', 'surrogatepass').decode('utf-16-be', 'surrogatepass')
+
+def decode_utf8(constant_pool : List[Optional[CpInfo]], utf8 : List[Optional[str]], index: int) -> str:
+    # most CONSTANT_Utf8 entries are never looked up, so they are only decoded (once) when asked for.
+    # Entries that don't decode fail the lookup rather than the parse, except for method names and
+    # descriptors: parse_class_bytes decodes those up front for the methods_lookup keys.
+    # Names are interned so that the same name from different classes (e.g. as part of a
+    # methods_lookup key) compares by identity.
+    s = utf8[index - 1]
+    if s is None:
+        s = utf8[index - 1] = sys.intern(decode_modified_utf8(constant_pool[index - 1].bytes))
+    return s
+
+def get_utf8(clazz : JVMClassFile, index: int) -> str:
+    assert index > 0, "Constant pool index must be positive"
+    return decode_utf8(clazz.constant_pool, clazz.utf8, index)
 
-def get_name_of_member(constant_pool : List[dict], name_and_type_index: int) -> str:
-    return constant_pool[constant_pool[name_and_type_index - 1]['name_index'] - 1]['bytes'].decode('utf-8')
+def get_name_of_class(clazz : JVMClassFile, class_index: int) -> str:
+    return decode_utf8(clazz.constant_pool, clazz.utf8, clazz.constant_pool[class_index - 1].name_index)
 
-CACHED_ATTR_INSTANCES = {}
+def get_name_of_member(clazz : JVMClassFile, name_and_type_index: int) -> str:
+    return decode_utf8(clazz.constant_pool, clazz.utf8, clazz.constant_pool[name_and_type_index - 1].name_index)
 
-def from_cp(constant_pool : List[dict], index: int) -> dict:
+def from_cp(constant_pool : List[Optional[CpInfo]], index: int) -> CpInfo:
     assert index > 0, "Constant pool index must be positive"
     return constant_pool[index - 1]
 
 def from_bsm(clazz : JVMClassFile, index: int) -> dict:
     assert index >= 0, "Bootstrap method index must be non-negative"
-    assert clazz.attributes is not None, "Bootstrap method index must be non-negative"
-    bsm_info = None
-    if AttributeInfoName.BOOTSTRAP_METHOD.value in CACHED_ATTR_INSTANCES:
-        bsm_info = CACHED_ATTR_INSTANCES[AttributeInfoName.BOOTSTRAP_METHOD]
-    else: # find the BootstrapMethods attribute
-        for attr in clazz.attributes: # should be cached, as it is the only bsm
-            if attr['_name'] == AttributeInfoName.BOOTSTRAP_METHOD.value:
-                bsm_info = attr['info']
-                CACHED_ATTR_INSTANCES[AttributeInfoName.BOOTSTRAP_METHOD] = bsm_info
-    if bsm_info != None:
-        return bsm_info['bootstrap_methods'][index]
-    raise RuntimeError("Bootstrap method not found")
-
-def parse_flags(value: int, flags: List[Tuple[str, int]]) -> List[str]:
-    return [name for (name, mask) in flags if (value & mask) != 0]
-
-def parse_attributes(constant_pool : List[dict], f : Union[io.BytesIO, BufferedReader], count : int) -> list:
-    attributes = []
+    if clazz.bootstrap_methods is None:
+        raise RuntimeError("Bootstrap method not found")
+    return clazz.bootstrap_methods[index]
+
+def parse_flags(value: int, flag_names: Dict[int, str]) -> List[str]:
+    # visits only the set bits (lowest first), access flags usually have just 2-4 of them
+    names = []
+    while value:
+        bit = value & -value
+        name = flag_names.get(bit)
+        if name is not None:
+            names.append(name)
+        value ^= bit
+    return names
+
+# Classes and methods only use a handful of distinct flag combinations, so the decoded names are
+# memoized per value. The results are shared, hence tuples.
+@lru_cache(maxsize=None)
+def parse_class_flags(value: int) -> Tuple[str, ...]:
+    return tuple(parse_flags(value, CLASS_ACCESS_FLAG_NAMES))
+
+@lru_cache(maxsize=None)
+def parse_method_flags(value: int) -> Tuple[str, ...]:
+    return tuple(parse_flags(value, METHOD_ACCESS_FLAG_NAMES))
+
+def parse_u2_array(buf : bytes, off : int, count : int) -> Tuple[List[int], int]:
+    # decodes `count` consecutive u2 values in a single unpack call
+    return list(struct.unpack_from(f'>{count}H', buf, off)), off + 2 * count
+
+def parse_attributes(constant_pool : List[Optional[CpInfo]], buf : bytes, off : int, count : int,
+                     interesting : Optional[FrozenSet[AttributeKind]]) -> Tuple[list, int]:
+    # interesting: kinds whose body is parsed, the others are kept with info=None (None parses all)
+    attributes : List[Optional[AttributeInfo]] = [None] * count
     for j in range(count):
         # attribute_info {
         #     u2 attribute_name_index;
         #     u4 attribute_length;
         #     u1 info[attribute_length];
         # }
-        attribute = {}
-        attribute['attribute_name_index'] = parse_i2(f)
-        attribute['_name'] = from_cp(constant_pool, attribute['attribute_name_index'])['bytes']
-        attribute_length = parse_i4(f)
+        attribute_name_index, attribute_length = ATTRIBUTE_HEADER.unpack_from(buf, off)
+        off += ATTRIBUTE_HEADER.size
+        name = from_cp(constant_pool, attribute_name_index).bytes
+        kind = ATTRIBUTE_KINDS.get(name, AttributeKind.UNKNOWN)
+        if interesting is not None and kind not in interesting:
+            attributes[j] = AttributeInfo(attribute_name_index, kind, None)
+            off += attribute_length
+            if off > len(buf): # nothing reads a skipped body, so check it is actually there
+                raise RuntimeError("Truncated class file: attribute runs past the end of the file")
+            continue
+        if kind == AttributeKind.UNKNOWN:
+            raise NotImplementedError(f"Attribute {name} is not implemented")
         
-        info_bytes = f.read(attribute_length)
-        attribute['info'] = parse_attribute_info(constant_pool, attribute['_name'], info_bytes)
-        attributes.append(attribute)
-    return attributes
+        info = parse_attribute_info(constant_pool, kind, buf, off, interesting)
+        off += attribute_length # sub-parsers may not consume the whole attribute (e.g. StackMapTable)
+        attributes[j] = AttributeInfo(attribute_name_index, kind, info)
+    return attributes, off
        
-def parse_attribute_info(constant_pool : List[dict], attr_name : bytes, info_bytes) -> dict:
-    attr_info_stream = io.BytesIO(info_bytes)
-    try:
-        attr_info_type = AttributeInfoName(attr_name)
-    except ValueError:
-        raise NotImplementedError(f"Attribute {attr_name} is not implemented")
-    match attr_info_type:
-        case AttributeInfoName.BOOTSTRAP_METHOD:
-            return parse_attribute_info_BootstrapMethods(constant_pool, attr_info_stream)
-        case AttributeInfoName.SOURCE_FILE:
-            return parse_attribute_info_SourceFile(constant_pool, attr_info_stream)
-        case AttributeInfoName.INNER_CLASSES:
-            return parse_attribute_info_InnerClasses(constant_pool, attr_info_stream)
-        case AttributeInfoName.CODE:
-            return parse_attribute_info_Code(constant_pool, attr_info_stream)
-        case AttributeInfoName.LINE_NUMBER_TABLE:
-            return parse_attribute_info_LineNumberTable(constant_pool, attr_info_stream)
-        case AttributeInfoName.STACK_MAP_TABLE:
-            return parse_attribute_info_StackMapTable(constant_pool, attr_info_stream)
-        case AttributeInfoName.CONSTANT_VALUE:
-            return parse_attribute_info_ConstantValue(constant_pool, attr_info_stream)
-        case AttributeInfoName.SIGNATURE:
-            return parse_attribute_info_Signature(constant_pool, attr_info_stream)
-        case AttributeInfoName.RUNTIME_VISIBLE_ANNOTATIONS:
-            return parse_attribute_info_RuntimeVisibleAnnotations(constant_pool, attr_info_stream)
-        case AttributeInfoName.LOCAL_VARIABLE_TABLE:
-            return {}
-        case AttributeInfoName.LOCAL_VARIABLE_TYPE_TABLE:
-            return {}
-        case AttributeInfoName.EXCEPTIONS:
-            return parse_attribute_info_Exceptions(constant_pool, attr_info_stream)
-        case AttributeInfoName.NEST_MEMBERS:
-            return parse_attribute_info_NestMembers(constant_pool, attr_info_stream)
-        case _:
-            raise NotImplementedError(f'attribute {attr_name} is not implemented')
-
-def parse_attribute_info_BootstrapMethods(constant_pool : List[dict], f : io.BytesIO):
+def parse_attribute_info(constant_pool : List[Optional[CpInfo]], kind : AttributeKind, buf : bytes, off : int,
+                         interesting : Optional[FrozenSet[AttributeKind]]) -> Union[CodeAttribute, dict]:
+    if kind == AttributeKind.CODE: # the only attribute with nested attributes, they use the same filter
+        return parse_attribute_info_Code(constant_pool, buf, off, interesting)[0]
+    return ATTRIBUTE_PARSERS[kind](constant_pool, buf, off)[0]
+
+def parse_attribute_info_BootstrapMethods(constant_pool : List[Optional[CpInfo]], buf : bytes, off : int) -> Tuple[dict, int]:
     attr = {}
-    attr['num_bootstrap_methods'] = parse_i2(f)
-    bootstrap_methods = []
+    attr['num_bootstrap_methods'] = U2.unpack_from(buf, off)[0]
+    off += 2
+    bootstrap_methods : List[Optional[dict]] = [None] * attr['num_bootstrap_methods']
     for i in range(attr['num_bootstrap_methods']):
         method = {}
-        method['bootstrap_method_ref'] = parse_i2(f)
-        method['num_bootstrap_arguments'] = parse_i2(f)
-        method['bootstrap_arguments'] = []
-        for j in range(method['num_bootstrap_arguments']):
-            method['bootstrap_arguments'].append(parse_i2(f))
-        bootstrap_methods.append(method)
+        method['bootstrap_method_ref'], method['num_bootstrap_arguments'] = U2x2.unpack_from(buf, off)
+        off += 4
+        method['bootstrap_arguments'], off = parse_u2_array(buf, off, method['num_bootstrap_arguments'])
+        bootstrap_methods[i] = method
     attr['bootstrap_methods'] = bootstrap_methods
-    return attr
+    return attr, off
 
-def parse_attribute_info_SourceFile(constant_pool : List[dict], f : io.BytesIO):
+def parse_attribute_info_SourceFile(constant_pool : List[Optional[CpInfo]], buf : bytes, off : int) -> Tuple[dict, int]:
     attr = {}
-    attr['sourcefile_index'] = parse_i2(f)
-    return attr
+    attr['sourcefile_index'] = U2.unpack_from(buf, off)[0]
+    return attr, off + 2
 
-def parse_attribute_info_InnerClasses(constant_pool : List[dict], f : io.BytesIO):
-    attr = {}
-    attr['number_of_classes'] = parse_i2(f)
-    classes = []
-    for i in range(attr['number_of_classes']):
-        cls = {}
-        cls['inner_class_info_index'] = parse_i2(f)
-        cls['outer_class_info_index'] = parse_i2(f)
-        cls['inner_name_index'] = parse_i2(f)
-        cls['inner_class_access_flags'] = parse_i2(f)
-        classes.append(cls)
-    attr['classes'] = classes
-    return attr
-
-def parse_attribute_info_LineNumberTable(constant_pool : List[dict], f : io.BytesIO):
+def parse_attribute_info_InnerClasses(constant_pool : List[Optional[CpInfo]], buf : bytes, off : int) -> Tuple[dict, int]:
     attr = {}
-    attr['line_number_table_length'] = parse_i2(f)
-    table = []
-    for i in range(attr['line_number_table_length']):
-        entry = {}
-        entry['start_pc'] = parse_i2(f)
-        entry['line_number'] = parse_i2(f)
-        table.append(entry)
-    attr['line_number_table'] = table
-    return attr
+    attr['number_of_classes'] = U2.unpack_from(buf, off)[0]
+    off += 2
+    end = off + attr['number_of_classes'] * INNER_CLASS_ENTRY.size
+    attr['classes'] = [InnerClassEntry(*entry) for entry in INNER_CLASS_ENTRY.iter_unpack(memoryview(buf)[off:end])]
+    return attr, end
 
-def parse_attribute_info_StackMapTable(constant_pool : List[dict], f : io.BytesIO):
+def parse_attribute_info_LineNumberTable(constant_pool : List[Optional[CpInfo]], buf : bytes, off : int) -> Tuple[dict, int]:
+    attr = {}
+    attr['line_number_table_length'] = U2.unpack_from(buf, off)[0]
+    off += 2
+    end = off + attr['line_number_table_length'] * U2x2.size
+    attr['line_number_table'] = [LineNumberEntry(start_pc, line_number)
+                                 for (start_pc, line_number) in U2x2.iter_unpack(memoryview(buf)[off:end])]
+    return attr, end
+
+def parse_attribute_info_StackMapTable(constant_pool : List[Optional[CpInfo]], buf : bytes, off : int) -> Tuple[dict, int]:
     attr = {}
-    attr['number_of_entries'] = parse_i2(f)
-    entries = []
+    attr['number_of_entries'] = U2.unpack_from(buf, off)[0]
+    off += 2
+    entries : List[Optional[dict]] = [None] * attr['number_of_entries']
     for i in range(attr['number_of_entries']):
         entry = {}
-        entry['frame_type'] = parse_i1(f)
+        entry['frame_type'] = buf[off]
+        off += 1
         if entry['frame_type'] <= 63:
             pass
         elif entry['frame_type'] <= 127:
@@ -188,12 +367,12 @@ def parse_attribute_info_StackMapTable(constant_pool : List[dict], f : io.BytesI
             pass
         elif entry['frame_type'] <= 255:
             pass
-        entries.append(entry)
+        entries[i] = entry
     attr['entries'] = entries
-    return attr
+    return attr, off
 
-def parse_attribute_info_Code(constant_pool : List[dict], f : io.BytesIO) -> dict:
-    code_attribute = {}
+def parse_attribute_info_Code(constant_pool : List[Optional[CpInfo]], buf : bytes, off : int,
+                              interesting : Optional[FrozenSet[AttributeKind]] = None) -> Tuple[CodeAttribute, int]:
     # Code_attribute {
     #     u2 attribute_name_index;
     #     u4 attribute_length;
@@ -210,255 +389,280 @@ def parse_attribute_info_Code(constant_pool : List[dict], f : io.BytesIO) -> dic
     #     u2 attributes_count;
     #     attribute_info attributes[attributes_count];
     # }
-    code_attribute['max_stack'] = parse_i2(f)
-    code_attribute['max_locals'] = parse_i2(f)
-    code_length = parse_i4(f)
-    code_attribute['code'] = f.read(code_length)
-    exception_table_length = parse_i2(f)
-    exception_table = []
-    for _ in range(exception_table_length):
-        exception_table.append({
-            'start_pc': parse_i2(f),
-            'end_pc': parse_i2(f),
-            'handler_pc': parse_i2(f),
-            'catch_type': parse_i2(f)
-        })
-    attributes_count = parse_i2(f)
-    code_attribute['attributes'] = parse_attributes(constant_pool, f, attributes_count)
-    # NOTE: parsing the code attribute is not finished
-    return code_attribute
-
-def parse_attribute_info_ConstantValue(constant_pool : List[dict], f : io.BytesIO):
-    return {'constantvalue_index': parse_i2(f)}
-
-def parse_attribute_info_Signature(constant_pool : List[dict], f : io.BytesIO):
-    return {'signature_index': parse_i2(f)}
-
-def parse_attribute_info_RuntimeVisibleAnnotations(constant_pool : List[dict], f : io.BytesIO):
+    max_stack, max_locals, code_length = CODE_HEADER.unpack_from(buf, off)
+    off += CODE_HEADER.size
+    code = buf[off:off+code_length]
+    off += code_length
+    exception_table_length = U2.unpack_from(buf, off)[0]
+    off += 2
+    exception_table : List[Optional[ExceptionTableEntry]] = [None] * exception_table_length
+    for i in range(exception_table_length):
+        exception_table[i] = ExceptionTableEntry(*EXCEPTION_TABLE_ENTRY.unpack_from(buf, off))
+        off += EXCEPTION_TABLE_ENTRY.size
+    attributes_count = U2.unpack_from(buf, off)[0]
+    attributes, off = parse_attributes(constant_pool, buf, off + 2, attributes_count, interesting)
+    return CodeAttribute(max_stack, max_locals, code, exception_table, attributes), off
+
+def parse_attribute_info_ConstantValue(constant_pool : List[Optional[CpInfo]], buf : bytes, off : int) -> Tuple[dict, int]:
+    return {'constantvalue_index': U2.unpack_from(buf, off)[0]}, off + 2
+
+def parse_attribute_info_Signature(constant_pool : List[Optional[CpInfo]], buf : bytes, off : int) -> Tuple[dict, int]:
+    return {'signature_index': U2.unpack_from(buf, off)[0]}, off + 2
+
+def parse_attribute_info_RuntimeVisibleAnnotations(constant_pool : List[Optional[CpInfo]], buf : bytes, off : int) -> Tuple[dict, int]:
     attr = {}
-    attr['num_annotations'] = parse_i2(f)
-    annotations = []
+    attr['num_annotations'] = U2.unpack_from(buf, off)[0]
+    off += 2
+    annotations : List[Optional[dict]] = [None] * attr['num_annotations']
     for i in range(attr['num_annotations']):
-        annotations.append(parse_annotation(constant_pool, f))
+        annotations[i], off = parse_annotation(constant_pool, buf, off)
     attr['annotations'] = annotations
-    return attr
+    return attr, off
 
-def parse_annotation(constant_pool : List[dict], f : io.BytesIO):
+def parse_annotation(constant_pool : List[Optional[CpInfo]], buf : bytes, off : int) -> Tuple[dict, int]:
+    type_index, num_element_value_pairs = U2x2.unpack_from(buf, off)
+    off += 4
     annotation : Dict[str, Any] = {
-            'type_index': parse_i2(f),
+            'type_index': type_index,
+        }
+    annotation['num_element_value_pairs'] = num_element_value_pairs
+    element_value_pairs : List[Optional[dict]] = [None] * num_element_value_pairs
+    for j in range(num_element_value_pairs):
+        element_name_index = U2.unpack_from(buf, off)[0]
+        value, off = parse_element_value(constant_pool, buf, off + 2)
+        element_value_pairs[j] = {
+            'element_name_index': element_name_index,
+            'value': value,
         }
-    annotation['num_element_value_pairs'] = parse_i2(f)
-    element_value_pairs = []
-    for j in range(annotation['num_element_value_pairs']):
-        element_value_pairs.append({
-            'element_name_index': parse_i2(f),
-            'value': parse_element_value(constant_pool, f),
-        })
     annotation['element_value_pairs'] = element_value_pairs
-    return annotation
-
-def parse_element_value(constant_pool : List[dict], f : io.BytesIO):
-    tag = parse_i1(f)
-    if tag == 66:
-        return {'const_value_index': parse_i2(f)}
-    elif tag == 67:
-        return {'const_value_index': parse_i2(f)}
-    elif tag == 68:
-        return {'const_value_index': parse_i2(f)}
-    elif tag == 70:
-        return {'const_value_index': parse_i2(f)}
-    elif tag == 73:
-        return {'const_value_index': parse_i2(f)}
-    elif tag == 74:
-        return {'const_value_index': parse_i2(f)}
-    elif tag == 83:
-        return {'const_value_index': parse_i2(f)}
-    elif tag == 90:
-        return {'const_value_index': parse_i2(f)}
-    elif tag == 115:
-        return {'const_value_index': parse_i2(f)}
+    return annotation, off
+
+def parse_element_value(constant_pool : List[Optional[CpInfo]], buf : bytes, off : int) -> Tuple[dict, int]:
+    tag = buf[off]
+    off += 1
+    if tag in (66, 67, 68, 70, 73, 74, 83, 90, 115):
+        return {'const_value_index': U2.unpack_from(buf, off)[0]}, off + 2
     elif tag == 101:
+        type_name_index, const_name_index = U2x2.unpack_from(buf, off)
         return {'enum_const_value': {
-            'type_name_index': parse_i2(f),
-            'const_name_index': parse_i2(f),
-        }}
+            'type_name_index': type_name_index,
+            'const_name_index': const_name_index,
+        }}, off + 4
     elif tag == 99:
-        return {'class_info_index': parse_i2(f)}
+        return {'class_info_index': U2.unpack_from(buf, off)[0]}, off + 2
     elif tag == 64:
-        return {'annotation_value': parse_annotation(constant_pool, f)}
+        annotation, off = parse_annotation(constant_pool, buf, off)
+        return {'annotation_value': annotation}, off
     elif tag == 91:
-        return {'array_value': parse_array_value(constant_pool, f)}
+        array_value, off = parse_array_value(constant_pool, buf, off)
+        return {'array_value': array_value}, off
     else:
         raise NotImplementedError("We don't support element value tag %d" % tag)
 
-def parse_array_value(constant_pool : List[dict], f : io.BytesIO):
+def parse_array_value(constant_pool : List[Optional[CpInfo]], buf : bytes, off : int) -> Tuple[dict, int]:
     array_value = {}
-    array_value['num_values'] = parse_i2(f)
-    values = []
+    array_value['num_values'] = U2.unpack_from(buf, off)[0]
+    off += 2
+    values : List[Optional[dict]] = [None] * array_value['num_values']
     for i in range(array_value['num_values']):
-        values.append(parse_element_value(constant_pool, f))
+        values[i], off = parse_element_value(constant_pool, buf, off)
     array_value['values'] = values
-    return array_value
+    return array_value, off
 
-def parse_attribute_info_Exceptions(constant_pool : List[dict], f : io.BytesIO):
+def parse_attribute_info_Exceptions(constant_pool : List[Optional[CpInfo]], buf : bytes, off : int) -> Tuple[dict, int]:
     attr = {}
-    attr['number_of_exceptions'] = parse_i2(f)
-    attr['exception_index_table'] = []
-    for i in range(attr['number_of_exceptions']):
-        attr['exception_index_table'].append(parse_i2(f))
-    return attr
+    attr['number_of_exceptions'] = U2.unpack_from(buf, off)[0]
+    attr['exception_index_table'], off = parse_u2_array(buf, off + 2, attr['number_of_exceptions'])
+    return attr, off
 
 
-def parse_attribute_info_NestMembers(constant_pool : List[dict], f : io.BytesIO):
+def parse_attribute_info_NestMembers(constant_pool : List[Optional[CpInfo]], buf : bytes, off : int) -> Tuple[dict, int]:
     attr = {}
-    attr['number_of_classes'] = parse_i2(f)
-    attr['classes'] = []
-    for i in range(attr['number_of_classes']):
-        attr['classes'].append(parse_i2(f))
-    return attr
-
-def print_constant_pool(constant_pool : List[dict], expand : bool = False):
+    attr['number_of_classes'] = U2.unpack_from(buf, off)[0]
+    attr['classes'], off = parse_u2_array(buf, off + 2, attr['number_of_classes'])
+    return attr, off
+
+def parse_attribute_info_Ignored(constant_pool : List[Optional[CpInfo]], buf : bytes, off : int) -> Tuple[dict, int]:
+    return {}, off
+
+# Attribute body parsers keyed by the attribute kind (Code is handled by parse_attribute_info itself)
+ATTRIBUTE_PARSERS : Dict[AttributeKind, Callable[[List[Optional[CpInfo]], bytes, int], Tuple[Any, int]]] = {
+    AttributeKind.BOOTSTRAP_METHOD            : parse_attribute_info_BootstrapMethods,
+    AttributeKind.SOURCE_FILE                 : parse_attribute_info_SourceFile,
+    AttributeKind.INNER_CLASSES               : parse_attribute_info_InnerClasses,
+    AttributeKind.LINE_NUMBER_TABLE           : parse_attribute_info_LineNumberTable,
+    AttributeKind.STACK_MAP_TABLE             : parse_attribute_info_StackMapTable,
+    AttributeKind.CONSTANT_VALUE              : parse_attribute_info_ConstantValue,
+    AttributeKind.SIGNATURE                   : parse_attribute_info_Signature,
+    AttributeKind.RUNTIME_VISIBLE_ANNOTATIONS : parse_attribute_info_RuntimeVisibleAnnotations,
+    AttributeKind.LOCAL_VARIABLE_TABLE        : parse_attribute_info_Ignored,
+    AttributeKind.LOCAL_VARIABLE_TYPE_TABLE   : parse_attribute_info_Ignored,
+    AttributeKind.EXCEPTIONS                  : parse_attribute_info_Exceptions,
+    AttributeKind.NEST_MEMBERS                : parse_attribute_info_NestMembers,
+}
+
+def print_constant_pool(constant_pool : List[Optional[CpInfo]], expand : bool = False):
     def expand_index(index):
         return constant_pool[index - 1]
     for i, cp_info in enumerate(constant_pool):
+        if cp_info is None:
+            continue
         expanded = {}
-        for k, v in cp_info.items():
+        for cp_field in dataclass_fields(cp_info):
+            k, v = cp_field.name, getattr(cp_info, cp_field.name)
             if k.endswith('_index') and expand:
                 expanded["__"+k[:-6]+"_"+str(v)] = expand_index(v)
             expanded[k] = v
-        print(i+1, expanded['tag'], end=": ")
+        print(i+1, cp_info.tag, end=": ")
         pprint(expanded)
     
 
-def parse_constant_pool(f, constant_pool_count) -> list:
-    constant_pool = []
-    for i in range(constant_pool_count-1):
-        cp_info = {}
-        tag_byte = parse_i1(f)
+def fixed_cp_parser(cp_type : type, layout : struct.Struct) -> Callable[[bytes, int], Tuple[CpInfo, int]]:
+    # most constant pool entries are a fixed struct straight into the record's fields
+    unpack_from, size = layout.unpack_from, layout.size
+    def parse_cp_entry(buf : bytes, off : int) -> Tuple[CpInfo, int]:
+        return cp_type(*unpack_from(buf, off)), off + size
+    return parse_cp_entry
+
+def parse_cp_Utf8(buf : bytes, off : int) -> Tuple[CpInfo, int]:
+    length = U2.unpack_from(buf, off)[0]
+    off += 2
+    return CpUtf8(buf[off:off+length]), off + length
+
+def parse_cp_Long(buf : bytes, off : int) -> Tuple[CpInfo, int]:
+    high_bytes, low_bytes = U4x2.unpack_from(buf, off)
+    return CpLong((high_bytes << 32) + low_bytes), off + 8
+
+def parse_cp_Double(buf : bytes, off : int) -> Tuple[CpInfo, int]:
+    high_bytes, low_bytes = U4x2.unpack_from(buf, off)
+    return CpDouble((high_bytes << 32) + low_bytes), off + 8
+
+# Constant pool entry parsers keyed by the raw tag byte
+CP_PARSERS : Dict[int, Callable[[bytes, int], Tuple[CpInfo, int]]] = {
+    Constant.CONSTANT_Class.value              : fixed_cp_parser(CpClass, U2),
+    Constant.CONSTANT_Fieldref.value           : fixed_cp_parser(CpFieldref, U2x2),
+    Constant.CONSTANT_Methodref.value          : fixed_cp_parser(CpMethodref, U2x2),
+    Constant.CONSTANT_InterfaceMethodref.value : fixed_cp_parser(CpInterfaceMethodref, U2x2),
+    Constant.CONSTANT_String.value             : fixed_cp_parser(CpString, U2),
+    Constant.CONSTANT_Integer.value            : fixed_cp_parser(CpInteger, U4),
+    Constant.CONSTANT_Float.value              : fixed_cp_parser(CpFloat, F4),
+    Constant.CONSTANT_Long.value               : parse_cp_Long,
+    Constant.CONSTANT_Double.value             : parse_cp_Double,
+    Constant.CONSTANT_NameAndType.value        : fixed_cp_parser(CpNameAndType, U2x2),
+    Constant.CONSTANT_Utf8.value               : parse_cp_Utf8,
+    Constant.CONSTANT_MethodHandle.value       : fixed_cp_parser(CpMethodHandle, struct.Struct('>BH')),
+    Constant.CONSTANT_MethodType.value         : fixed_cp_parser(CpMethodType, U2),
+    Constant.CONSTANT_InvokeDynamic.value      : fixed_cp_parser(CpInvokeDynamic, U2x2),
+}
+WIDE_CP_TAGS = (Constant.CONSTANT_Long.value, Constant.CONSTANT_Double.value)
+
+def parse_class_file(file_path : str, interesting : Optional[FrozenSet[AttributeKind]] = EXECUTION_ATTRIBUTES) -> JVMClassFile:
+    with open(file_path, "rb") as f:
+        buf = f.read() # class files are small, read it once and parse from memory
+    return parse_class_bytes(buf, interesting)
+
+def parse_class_bytes(buf : bytes, interesting : Optional[FrozenSet[AttributeKind]] = EXECUTION_ATTRIBUTES) -> JVMClassFile:
+    # Single pass over the whole class file with one cursor. Only attributes recurse (Code has
+    # its own attributes); the hot decoders are bound to locals to skip the global lookups.
+    unpack_u2 = U2.unpack_from
+    unpack_member_header = MEMBER_HEADER.unpack_from
+    cp_parsers = CP_PARSERS
+    
+    magic, v_minor, v_major, constant_pool_count = CLASS_HEADER.unpack_from(buf, 0)
+    if magic != 0xCAFEBABE:
+        raise RuntimeError("Not a Java file: invalid magic number")
+    version = (v_major, v_minor)
+    off = CLASS_HEADER.size
+    
+    # cp_info constant_pool[constant_pool_count-1];
+    constant_pool : List[Optional[CpInfo]] = [None] * (constant_pool_count-1)
+    i = 0
+    while i < constant_pool_count-1:
+        tag_byte = buf[off]
         try:
-            constant_tag = Constant(tag_byte)
-        except ValueError:
+            parse_cp_entry = cp_parsers[tag_byte]
+        except KeyError:
             raise NotImplementedError(f"Unknown constant tag {tag_byte} in class file.")
-        if Constant.CONSTANT_Methodref == constant_tag:
-            cp_info['class_index'] = parse_i2(f)
-            cp_info['name_and_type_index'] = parse_i2(f)
-        elif Constant.CONSTANT_Class == constant_tag:
-            cp_info['name_index'] = parse_i2(f)
-        elif Constant.CONSTANT_NameAndType == constant_tag:
-            cp_info['name_index'] = parse_i2(f)
-            cp_info['descriptor_index'] = parse_i2(f)
-        elif Constant.CONSTANT_Utf8 == constant_tag:
-            length = parse_i2(f);
-            cp_info['bytes'] = f.read(length)
-        elif Constant.CONSTANT_Fieldref == constant_tag:
-            cp_info['class_index'] = parse_i2(f)
-            cp_info['name_and_type_index'] = parse_i2(f)
-        elif Constant.CONSTANT_String == constant_tag:
-            cp_info['string_index'] = parse_i2(f)
-        elif Constant.CONSTANT_InvokeDynamic == constant_tag:
-            cp_info['bootstrap_method_attr_index'] = parse_i2(f)
-            cp_info['name_and_type_index'] = parse_i2(f)
-        elif Constant.CONSTANT_MethodHandle == constant_tag:
-            cp_info['reference_kind'] = parse_i1(f)
-            cp_info['reference_index'] = parse_i2(f)
-        elif Constant.CONSTANT_Float == constant_tag:
-            cp_info['bytes'] = parse_f4(f)
-        elif Constant.CONSTANT_Integer == constant_tag:
-            cp_info['bytes'] = parse_i4(f)
-        elif Constant.CONSTANT_Long == constant_tag:
-            high_bytes = parse_i4(f)
-            low_bytes = parse_i4(f)
-            cp_info['bytes'] = (high_bytes << 32) + low_bytes
-        elif Constant.CONSTANT_Double == constant_tag:
-            high_bytes = parse_i4(f)
-            low_bytes = parse_i4(f)
-            cp_info['bytes'] = (high_bytes << 32) + low_bytes
-        elif Constant.CONSTANT_InterfaceMethodref == constant_tag:
-            cp_info['class_index'] = parse_i2(f)
-            cp_info['name_and_type_index'] = parse_i2(f)
-        else:
-            raise NotImplementedError(f"Unexpected constant tag {constant_tag} in class file.")
-        cp_info['tag'] = constant_tag.name
-        constant_pool.append(cp_info)
-    return constant_pool
-
-def parse_interfaces(f, interfaces_count):
-    interfaces = []
-    for i in range(interfaces_count):
-        interface = {'index' : parse_i2(f)}
-        interfaces.append(interface)
-    return interfaces
-
-def parse_fields(constant_pool, f, fields_count):
-    fields = []
-    for _ in range(fields_count):
-        field = {}
-        field['access_flags'] = parse_i2(f)
-        field['name_index'] = parse_i2(f)
-        field['descriptor_index'] = parse_i2(f)
-        attributes_count = parse_i2(f)
-        field['attributes'] = parse_attributes(constant_pool, f, attributes_count)
-        fields.append(field)
-    return fields
-
-def parse_class_file(file_path : str) -> JVMClassFile:
-    with open(file_path, "rb") as f:
-        magic = hex(parse_i4(f))
-        if magic != '0xcafebabe':
-            raise RuntimeError("Not a Java file: invalid magic number")
-        v_minor = parse_i2(f)
-        v_major = parse_i2(f)
-        version = (v_major, v_minor)
-        
-        constant_pool_count = parse_i2(f)
-        constant_pool = parse_constant_pool(f, constant_pool_count)
-        
-        access_flags = parse_flags(parse_i2(f), CLASS_ACCESS_FLAGS)
-        this_class = parse_i2(f)
-        super_class = parse_i2(f)
-        
-        interfaces_count = int.from_bytes(f.read(2), byteorder='little') # NOTE: what the hell is this?
-        interfaces = parse_interfaces(f, interfaces_count)
-        fields_count = parse_i2(f)
-        fields = parse_fields(constant_pool, f, fields_count)
+        constant_pool[i], off = parse_cp_entry(buf, off + 1)
+        # 8-byte constants take up two entries, the second one is not usable and stays None
+        i += 2 if tag_byte in WIDE_CP_TAGS else 1
+    utf8 : List[Optional[str]] = [None] * len(constant_pool)
+    
+    # u2 access_flags; u2 this_class; u2 super_class; u2 interfaces_count; u2 interfaces[interfaces_count];
+    raw_access_flags, this_class, super_class, interfaces_count = CLASS_INFO.unpack_from(buf, off)
+    off += CLASS_INFO.size
+    access_flags = parse_class_flags(raw_access_flags)
+    interface_indices, off = parse_u2_array(buf, off, interfaces_count)
+    interfaces = [{'index' : index} for index in interface_indices]
+    
+    # u2 fields_count; field_info fields[fields_count];
+    fields_count = unpack_u2(buf, off)[0]
+    off += 2
+    fields : List[Optional[FieldInfo]] = [None] * fields_count
+    for i in range(fields_count):
+        raw_field_flags, name_index, descriptor_index, attributes_count = unpack_member_header(buf, off)
+        attributes, off = parse_attributes(constant_pool, buf, off + 8, attributes_count, interesting)
+        fields[i] = FieldInfo(raw_field_flags, name_index, descriptor_index, attributes)
+    
+    # u2 methods_count; method_info methods[methods_count];
+    methods_count = unpack_u2(buf, off)[0]
+    off += 2
+    methods : List[Optional[MethodInfo]] = [None] * methods_count
+    methods_lookup = {}
+    methods_by_name : Dict[bytes, List[MethodInfo]] = {}
+    for i in range(methods_count):
+        # u2             access_flags;
+        # u2             name_index;
+        # u2             descriptor_index;
+        # u2             attributes_count;
+        # attribute_info attributes[attributes_count];
+        raw_method_flags, name_index, descriptor_index, attributes_count = unpack_member_header(buf, off)
+        off += 8
         
-        methods_count = parse_i2(f)
-        methods = []
-        methods_lookup = {}
-        for i in range(methods_count):
-            # u2             access_flags;
-            # u2             name_index;
-            # u2             descriptor_index;
-            # u2             attributes_count;
-            # attribute_info attributes[attributes_count];
-            method = {}
-            method['access_flags'] = parse_flags(parse_i2(f), METHOD_ACCESS_FLAGS)
-            method['name_index'] = parse_i2(f)
-            method['descriptor_index'] = parse_i2(f)
-            
-            #this_class_name = from_cp(constant_pool, constant_pool[this_class-1]['name_index'])['bytes'].decode('utf-8')
-            method_name = constant_pool[method['name_index']-1]['bytes'].decode('utf-8')
-            method_signature = constant_pool[method['descriptor_index']-1]['bytes'].decode('utf-8')
-            lookup_key = (method_name, method_signature)
-            print(f"Method {lookup_key}")
-            
-            attributes_count = parse_i2(f)
-            method['attributes'] = parse_attributes(constant_pool, f, attributes_count)
-            methods.append(method)
-            methods_lookup[lookup_key] = method
+        #this_class_name = get_utf8(clazz, constant_pool[this_class-1].name_index)
+        method_name = decode_utf8(constant_pool, utf8, name_index)
+        method_signature = decode_utf8(constant_pool, utf8, descriptor_index)
+        lookup_key = (method_name, method_signature)
+        print(f"Method {lookup_key}")
         
-        attributes_count = parse_i2(f)
-        attributes = parse_attributes(constant_pool, f, attributes_count)
-        return JVMClassFile(version, constant_pool, methods, methods_lookup, attributes, access_flags, this_class, super_class, interfaces, fields)
-
-def find_methods_by_name(clazz : JVMClassFile, name: bytes):
+        attributes, off = parse_attributes(constant_pool, buf, off, attributes_count, interesting)
+        method = MethodInfo(parse_method_flags(raw_method_flags), name_index, descriptor_index, attributes)
+        methods[i] = method
+        methods_lookup[lookup_key] = method
+        methods_by_name.setdefault(constant_pool[name_index-1].bytes, []).append(method)
+    
+    # u2 attributes_count; attribute_info attributes[attributes_count];
+    attributes_count = unpack_u2(buf, off)[0]
+    attributes, off = parse_attributes(constant_pool, buf, off + 2, attributes_count, interesting)
+    if off != len(buf):
+        raise RuntimeError(f"Malformed class file: parsed {off} of {len(buf)} bytes")
+    clazz = JVMClassFile(version, constant_pool, methods, methods_lookup, attributes, access_flags, this_class, super_class, interfaces, fields, utf8,
+                         methods_by_name=methods_by_name)
+    for attr in attributes:
+        clazz.attributes_by_kind.setdefault(attr.kind, []).append(attr)
+    bsm_attrs = clazz.attributes_by_kind.get(AttributeKind.BOOTSTRAP_METHOD)
+    if bsm_attrs: # a class has at most one BootstrapMethods attribute
+        clazz.bootstrap_methods = bsm_attrs[0].info['bootstrap_methods']
+    return clazz
+
+def parse_many(file_paths : List[str], workers : Optional[int] = None,
+               interesting : Optional[FrozenSet[AttributeKind]] = EXECUTION_ATTRIBUTES) -> List[JVMClassFile]:
+    # Class files parse independently of each other, so e.g. a whole jar is parsed in parallel.
+    # Worker processes get around the GIL; on free-threaded builds plain threads are enough.
+    gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+    executor_type = ProcessPoolExecutor if gil_enabled else ThreadPoolExecutor
+    with executor_type(max_workers=workers) as executor:
+        return list(executor.map(partial(parse_class_file, interesting=interesting), file_paths, chunksize=32))
+
+def find_methods_by_name(clazz : JVMClassFile, name: bytes) -> List[MethodInfo]:
     assert clazz.methods is not None, "Class methods not parsed"
-    return [method
-            for method in clazz.methods
-            if clazz.constant_pool[method['name_index'] - 1]['bytes'] == name]
+    return clazz.methods_by_name.get(name, [])
 
-def find_attributes_by_name(clazz : JVMClassFile, name: bytes):
+def find_attributes_by_name(clazz : JVMClassFile, name: bytes) -> List[AttributeInfo]:
+    # Only names in AttributeInfoName can be found: unknown attributes are all filed under
+    # AttributeKind.UNKNOWN, so look for those by attribute_name_index in clazz.attributes instead.
     assert clazz.attributes is not None, "Class attributes not parsed"
-    return [attr
-            for attr in clazz.attributes
-            if clazz.constant_pool[attr['attribute_name_index'] - 1]['bytes'] == name]
\ No newline at end of file
+    kind = ATTRIBUTE_KINDS.get(name)
+    if kind is None:
+        return []
+    return clazz.attributes_by_kind.get(kind, [])
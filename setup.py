@@ -0,0 +1,14 @@
+# Optional: compile the class file parser with Cython for faster class loading
+#   pip install cython && python setup.py build_ext --inplace
+# Without the compiled modules (or on PyPy) the plain .py files are used as-is.
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name='pava',
+    ext_modules=cythonize(
+        ['jvmparser.py', 'utils.py'],
+        # types come from jvmparser.pxd, the annotations in the .py files are only hints
+        compiler_directives={'language_level': 3, 'annotation_typing': False},
+    ),
+)
@@ -2,15 +2,21 @@ from typing import Any, List, Tuple, Union
 import io
 import struct
 
+# Precompiled big-endian decoders, used with unpack_from on an in-memory class file
+U1 = struct.Struct('>B')
+U2 = struct.Struct('>H')
+U4 = struct.Struct('>I')
+F4 = struct.Struct('>f')
+
 
 def parse_u1(f : Union[io.BytesIO, io.BufferedReader]): # char
-    return struct.unpack('>B', f.read(1))[0]
+    return U1.unpack(f.read(1))[0]
 def parse_u2(f : Union[io.BytesIO, io.BufferedReader]) -> int: # short
-    return struct.unpack('>H', f.read(2))[0]
-def parse_i1(f : Union[io.BytesIO, io.BufferedReader]) -> int: return int.from_bytes(f.read(1), 'big')
-def parse_i2(f : Union[io.BytesIO, io.BufferedReader]) -> int: return int.from_bytes(f.read(2), 'big')
-def parse_i4(f : Union[io.BytesIO, io.BufferedReader]) -> int: return int.from_bytes(f.read(4), 'big') # int
-def parse_f4(f : Union[io.BytesIO, io.BufferedReader]) -> int: return struct.unpack('>f', f.read(4))[0]
+    return U2.unpack(f.read(2))[0]
+def parse_i1(f : Union[io.BytesIO, io.BufferedReader]) -> int: return U1.unpack(f.read(1))[0]
+def parse_i2(f : Union[io.BytesIO, io.BufferedReader]) -> int: return U2.unpack(f.read(2))[0]
+def parse_i4(f : Union[io.BytesIO, io.BufferedReader]) -> int: return U4.unpack(f.read(4))[0] # int
+def parse_f4(f : Union[io.BytesIO, io.BufferedReader]) -> int: return F4.unpack(f.read(4))[0]
 
 def u16_to_i16(v: int) -> int:
     if v & 0x8000: